@@ -0,0 +1,108 @@
+# importa base64 para montar pacotes CHUNK como os enviados pelo dispositivo
+import base64
+# importa os para gerar dados aleatórios dos blocos
+import os
+# importa timeit para medir o tempo de cada estratégia
+import timeit
+# importa logging para reproduzir o custo dos logs feitos a cada pacote recebido
+import logging
+# importa o dispositivo, cujo tratamento de datagramas é medido diretamente
+from dispositivo import Dispositivo
+# importa as classes de mensagem para montar a tabela de tratadores vazios
+from mensagens import Talk, TalkFragmento, TalkLote, File, Chunk, End, Nack
+
+# microbenchmark do custo de cpu por pacote no recebimento: compara o caminho antigo
+# (decode + split em todos os espaços + cadeia de if/elif, com o log do pacote inteiro) com
+# Dispositivo._tratar_datagrama, com tratadores vazios e sem sockets. a primeira tabela mede com
+# os logs desabilitados, a segunda com os logs gravados em os.devnull, como no laço de recebimento
+
+# número de pacotes processados em cada medição
+REPETICOES = 100000
+# número de pacotes nas medições com log, que são bem mais lentas
+REPETICOES_LOG = 10000
+# número de medições de cada caminho; vale a menor, intercalando antigo e novo para reduzir o ruído
+RODADAS = 9
+
+
+# tratador vazio, para medir só a análise, o log e o despacho
+def _tratador(msg, endereco):
+    pass
+
+
+# caminho antigo: loga o pacote bruto e o texto inteiro, divide em palavras e compara o tipo com cada string
+def receber_antigo(dados: bytes, endereco):
+    logging.info(f"DEBUG: Pacote recebido de {endereco}: {dados}")
+    mensagem = dados.decode()
+    logging.info(f"RECEBIDO de {endereco}: {mensagem}")
+    partes = mensagem.split()
+    if not partes:
+        return
+    tipo_mensagem = partes[0]
+    if tipo_mensagem == "HEARTBEAT":
+        _tratador(partes, endereco)
+    elif tipo_mensagem == "TALK":
+        _tratador(" ".join(partes[2:]), endereco)
+    elif tipo_mensagem == "FILE":
+        _tratador(partes, endereco)
+    elif tipo_mensagem == "CHUNK":
+        _tratador(partes, endereco)
+    elif tipo_mensagem == "END":
+        _tratador(partes, endereco)
+    elif tipo_mensagem == "ACK":
+        _tratador(partes, endereco)
+    elif tipo_mensagem == "NACK":
+        _tratador(partes, endereco)
+
+
+# cria um dispositivo sem socket e sem threads, com tratadores vazios, para medir _tratar_datagrama
+def criar_dispositivo() -> Dispositivo:
+    dispositivo = Dispositivo.__new__(Dispositivo)
+    dispositivo._processar_heartbeat = _tratador
+    dispositivo._processar_ack = _tratador
+    dispositivo.tratadores = {classe: _tratador for classe in (Talk, TalkFragmento, TalkLote, File, Chunk, End, Nack)}
+    return dispositivo
+
+
+# mede o tempo médio por pacote (em microssegundos) dos dois caminhos, intercalando as rodadas
+def medir(antigo, novo, dados: bytes, repeticoes: int):
+    endereco = ('127.0.0.1', 5000)
+    tempos_antigo = []
+    tempos_novo = []
+    for _ in range(RODADAS):
+        tempos_antigo.append(timeit.timeit("f(d, e)", globals={'f': antigo, 'd': dados, 'e': endereco}, number=repeticoes))
+        tempos_novo.append(timeit.timeit("f(d, e)", globals={'f': novo, 'd': dados, 'e': endereco}, number=repeticoes))
+    return min(tempos_antigo) / repeticoes * 1e6, min(tempos_novo) / repeticoes * 1e6
+
+
+# mede e imprime a comparação entre o caminho antigo e o novo para cada pacote
+def comparar(titulo: str, antigo, novo, pacotes: dict, repeticoes: int):
+    print(f"\n{titulo}")
+    print(f"{'pacote':<14} | {'antigo (us)':>11} | {'novo (us)':>9} | {'ganho':>6}")
+    print("-" * 50)
+    for nome, dados in pacotes.items():
+        tempo_antigo, tempo_novo = medir(antigo, novo, dados, repeticoes)
+        print(f"{nome:<14} | {tempo_antigo:>11.3f} | {tempo_novo:>9.3f} | {tempo_antigo / tempo_novo:>5.2f}x")
+
+
+# função principal, monta os pacotes de exemplo e imprime as comparações
+def main():
+    pacotes = {
+        "CHUNK (1KB)": f"CHUNK arquivo.txt_1700000000 42 {base64.b64encode(os.urandom(1024)).decode()}".encode(),
+        "TALK (texto)": ("TALK dispositivo1_1700000000_7 " + "olá, tudo bem? " * 20).encode(),
+        "ACK": b"ACK arquivo.txt_1700000000 42",
+        "HEARTBEAT": b"HEARTBEAT dispositivo1",
+    }
+    novo = criar_dispositivo()._tratar_datagrama
+    # os logs do dispositivo vão para os.devnull, sem sobrescrever logs_dispositivo.log
+    raiz = logging.getLogger()
+    for handler in raiz.handlers[:]:
+        raiz.removeHandler(handler)
+    raiz.addHandler(logging.FileHandler(os.devnull, encoding="utf-8"))
+    logging.disable(logging.CRITICAL)
+    comparar("Análise e despacho (logs desabilitados)", receber_antigo, novo, pacotes, REPETICOES)
+    logging.disable(logging.NOTSET)
+    comparar("Laço de recebimento com logs (gravados em os.devnull)", receber_antigo, novo, pacotes, REPETICOES_LOG)
+
+
+if __name__ == "__main__":
+    main()
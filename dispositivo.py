@@ -12,12 +12,16 @@ import hashlib
 import json
 # importa os para manipulação de arquivos e caminhos
 import os
+# importa itertools para gerar sequências de ids de mensagens
+import itertools
 # importa tipos para anotações de variáveis e funções
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 # importa datetime para registrar logs com data e hora
 from datetime import datetime
 # importa logging para gerenciar logs
 import logging
+# importa a camada de decodificação das mensagens do protocolo
+from mensagens import decodificar, INICIAL_HEARTBEAT, INICIAL_ACK, Talk, TalkFragmento, TalkLote, File, Chunk, End, Nack
 
 # configura o logging para salvar em arquivo
 logging.basicConfig(
@@ -30,6 +34,18 @@ logging.basicConfig(
 
 # tamanho do bloco para transferência de arquivos (1KB)
 CHUNK_SIZE = 1024
+# tamanho máximo (em bytes) do texto de uma mensagem TALK por datagrama; acima disso a mensagem é fragmentada
+TALK_FRAGMENT_SIZE = 1024
+# número máximo de mensagens pequenas agrupadas em um único datagrama TALKBATCH
+TALK_BATCH_MAX = 64
+# número de fragmentos TALKFRAG enviados antes de aguardar os ACKs (janela)
+TALK_FRAG_WINDOW = 32
+# tempo (em segundos) para descartar mensagens fragmentadas incompletas
+TALK_REASSEMBLY_TIMEOUT = 30
+# tempo (em segundos) que ids de TALK já confirmados são lembrados para ignorar ACKs atrasados ou duplicados
+TALK_ACK_TARDIO_TIMEOUT = 30
+# tempo (em segundos) sem mensagens na fila para encerrar a thread de envio de um destino
+TALK_SENDER_IDLE_TIMEOUT = 10
 
 # classe que representa um dispositivo p2p na rede
 class Dispositivo:
@@ -57,6 +73,33 @@ class Dispositivo:
         self.acks_recebidos: Dict[str, float] = {}
         # estado atual de envio de arquivo
         self.estado_envio_arquivo: Optional[dict] = None
+        # condição usada para acordar quem aguarda ACKs (envio de mensagens TALK)
+        self.cond_acks = threading.Condition()
+        # fila de mensagens TALK pendentes por destino (nome -> lista de mensagens)
+        self.fila_talk: Dict[str, List[dict]] = {}
+        # condição que protege as filas de TALK e acorda as threads de envio
+        self.cond_talk = threading.Condition()
+        # threads de envio de TALK, uma por destino (nome -> thread), criadas sob demanda
+        self.threads_talk: Dict[str, threading.Thread] = {}
+        # ids de TALK (mensagens, lotes e fragmentos) aguardando ACK
+        self.talks_pendentes: set = set()
+        # ids de TALK já confirmados (id -> timestamp), para ignorar ACKs atrasados ou duplicados
+        self.talks_concluidos: Dict[str, float] = {}
+        # mensagens TALK fragmentadas em remontagem (id -> fragmentos recebidos)
+        self.talks_fragmentados: Dict[str, dict] = {}
+        # contador usado para gerar ids únicos de TALK dentro do mesmo segundo
+        self.contador_talk = itertools.count()
+        # tabela de despacho: classe da mensagem decodificada -> método que a processa
+        # (HEARTBEAT e ACK seguem o caminho rápido em _tratar_datagrama)
+        self.tratadores = {
+            Talk: self._processar_talk,
+            TalkFragmento: self._processar_talk_fragmento,
+            TalkLote: self._processar_talk_lote,
+            File: self._processar_file,
+            Chunk: self._processar_chunk,
+            End: self._processar_end,
+            Nack: self._processar_nack,
+        }
         # registra no log a inicialização do dispositivo
         self._log(f"Dispositivo {nome} inicializado na porta {porta}")
         self._log(f"Usando endereço de broadcast: {self.broadcast_address}")
@@ -100,6 +143,17 @@ class Dispositivo:
                 if agora - ultimo_heartbeat > 10:
                     self._log(f"Dispositivo {nome} removido por inatividade")
                     del self.dispositivos_ativos[nome]
+            # descarta mensagens fragmentadas que não foram completadas a tempo
+            # (a thread de recebimento pode remover a mesma entrada ao completar a mensagem)
+            for id_msg in list(self.talks_fragmentados.keys()):
+                estado = self.talks_fragmentados.get(id_msg)
+                if estado and agora - estado['inicio'] > TALK_REASSEMBLY_TIMEOUT:
+                    if self.talks_fragmentados.pop(id_msg, None) is not None:
+                        self._log(f"Mensagem fragmentada {id_msg} descartada por estar incompleta")
+            # esquece ids de TALK confirmados há tempo suficiente para não chegarem mais ACKs
+            for id_msg, concluido in list(self.talks_concluidos.items()):
+                if agora - concluido > TALK_ACK_TARDIO_TIMEOUT:
+                    self.talks_concluidos.pop(id_msg, None)
             # espera 1 segundo antes de verificar novamente
             time.sleep(1)
 
@@ -109,31 +163,39 @@ class Dispositivo:
             try:
                 # recebe dados e endereço de origem
                 dados, endereco = self.socket.recvfrom(65536)
-                self._log(f"DEBUG: Pacote recebido de {endereco}: {dados}", mostrar_tela=False)  # depuração
-                mensagem = dados.decode()
-                self._log(f"RECEBIDO de {endereco}: {mensagem}", mostrar_tela=False)
-                partes = mensagem.split()
-                if not partes:
-                    continue
-                tipo_mensagem = partes[0]
-                # verifica o tipo da mensagem e chama o método correspondente
-                if tipo_mensagem == "HEARTBEAT":
-                    self._processar_heartbeat(partes, endereco)
-                elif tipo_mensagem == "TALK":
-                    self._processar_talk(partes, endereco)
-                elif tipo_mensagem == "FILE":
-                    self._processar_file(partes, endereco)
-                elif tipo_mensagem == "CHUNK":
-                    self._processar_chunk(partes, endereco)
-                elif tipo_mensagem == "END":
-                    self._processar_end(partes, endereco)
-                elif tipo_mensagem == "ACK":
-                    self._processar_ack(partes, endereco)
-                elif tipo_mensagem == "NACK":
-                    self._processar_nack(partes, endereco)
+                self._tratar_datagrama(dados, endereco)
             except Exception as e:
                 self._log(f"ERRO ao receber mensagem: {e}")
 
+    # decodifica um datagrama recebido uma única vez, registra no log e despacha para o método do tipo
+    def _tratar_datagrama(self, dados: bytes, endereco):
+        # o conteúdo bruto só é formatado quando o log de depuração está habilitado
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(f"Pacote recebido de {endereco}: {dados}")
+        try:
+            inicial = dados[0]
+        except IndexError:
+            return  # datagrama vazio
+        # caminho rápido de HEARTBEAT e ACK: pacotes pequenos, decodificados e divididos uma vez só,
+        # com a lista de campos entregue direto ao tratador
+        if inicial == INICIAL_HEARTBEAT or inicial == INICIAL_ACK:
+            mensagem = dados.decode()
+            self._log(f"RECEBIDO de {endereco}: {mensagem}")
+            partes = mensagem.split()
+            if partes[0] == "HEARTBEAT":
+                self._processar_heartbeat(partes, endereco)
+            elif partes[0] == "ACK":
+                self._processar_ack(partes, endereco)
+            return
+        # decodifica só os campos de cabeçalho e despacha para o método correspondente ao tipo da mensagem;
+        # o log usa os campos já decodificados, sem copiar o conteúdo
+        msg = decodificar(dados)
+        if msg is None:
+            self._log(f"RECEBIDO de {endereco}: pacote inválido ou desconhecido ({len(dados)} bytes)")
+            return
+        self._log(f"RECEBIDO de {endereco}: {msg} ({len(dados)} bytes)")
+        self.tratadores[type(msg)](msg, endereco)
+
     # processa heartbeat recebido, atualiza ou adiciona dispositivo na lista
     def _processar_heartbeat(self, partes: List[str], endereco):
         if len(partes) < 2:
@@ -153,50 +215,255 @@ class Dispositivo:
         # atualiza timestamp do último heartbeat
         self.dispositivos_ativos[nome_dispositivo] = (ip, porta, time.time())
 
-    # processa mensagem TALK, exibe mensagem recebida e envia ACK
-    def _processar_talk(self, partes: List[str], endereco):
-        self._log(f"DEBUG: Entrou em _processar_talk com partes={partes} de {endereco}")
-        if len(partes) < 3:
-            return
-        id_msg = partes[1]
-        mensagem = " ".join(partes[2:])
+    # exibe mensagem TALK recebida, ignorando duplicatas já exibidas
+    def _exibir_talk(self, id_msg: str, mensagem: str, endereco):
         if id_msg not in self.mensagens_recebidas.get("TALK", set()):
             print(f"\nMensagem recebida: {mensagem}")
             self._log(f"Mensagem recebida de {endereco[0]}: {mensagem}")
             self.mensagens_recebidas.setdefault("TALK", set()).add(id_msg)
+
+    # processa mensagem TALK, exibe mensagem recebida e envia ACK
+    def _processar_talk(self, msg: Talk, endereco):
+        self._log(f"DEBUG: Entrou em _processar_talk com id={msg.id} mensagem={msg.texto} de {endereco}")
+        id_msg = msg.id
+        self._exibir_talk(id_msg, msg.texto, endereco)
         # envia ACK para confirmar recebimento (sempre unicast para quem enviou)
         resposta = f"ACK {id_msg}"
         self.socket.sendto(resposta.encode(), endereco)
 
-    # envia mensagem TALK para outro dispositivo, aguarda ACK e retransmite se necessário
-    def enviar_mensagem(self, nome_destino: str, mensagem: str):
+    # processa fragmento TALKFRAG, remonta a mensagem e envia ACK do fragmento
+    def _processar_talk_fragmento(self, msg: TalkFragmento, endereco):
+        id_msg = msg.id
+        seq = msg.seq
+        total = msg.total
+        if total <= 0 or seq < 0 or seq >= total:
+            return
+        # só armazena fragmentos de mensagens ainda não exibidas (duplicatas recebem apenas o ACK)
+        if id_msg not in self.mensagens_recebidas.get("TALK", set()):
+            estado = self.talks_fragmentados.setdefault(id_msg, {
+                'total': total,
+                'fragmentos': {},
+                'inicio': time.time()
+            })
+            # o total vem do primeiro fragmento; fragmentos com outro total são rejeitados
+            if total != estado['total']:
+                self._log(f"TALKFRAG {id_msg} {seq} inválido: total {total} diferente de {estado['total']}")
+                return
+            estado['fragmentos'].setdefault(seq, msg.texto)
+            if len(estado['fragmentos']) == estado['total']:
+                mensagem = "".join(estado['fragmentos'][i] for i in range(estado['total']))
+                self.talks_fragmentados.pop(id_msg, None)
+                self._exibir_talk(id_msg, mensagem, endereco)
+        ack_msg = f"ACK {id_msg} {seq}"
+        self.socket.sendto(ack_msg.encode(), endereco)
+
+    # processa lote TALKBATCH, exibe cada mensagem e envia um único ACK para o lote
+    def _processar_talk_lote(self, msg: TalkLote, endereco):
+        id_lote = msg.id
+        try:
+            mensagens = json.loads(msg.json)
+        except ValueError:
+            self._log(f"TALKBATCH {id_lote} inválido recebido de {endereco}")
+            return
+        # o json precisa ser uma lista de pares [id, texto]
+        if not isinstance(mensagens, list) or not all(
+                isinstance(item, list) and len(item) == 2 and all(isinstance(campo, str) for campo in item)
+                for item in mensagens):
+            self._log(f"TALKBATCH {id_lote} inválido recebido de {endereco}")
+            return
+        for id_msg, mensagem in mensagens:
+            self._exibir_talk(id_msg, mensagem, endereco)
+        ack_msg = f"ACK {id_lote}"
+        self.socket.sendto(ack_msg.encode(), endereco)
+
+    # gera id único para mensagens TALK, lotes e fragmentos
+    def _gerar_id_talk(self) -> str:
+        return f"{self.nome}_{int(time.time())}_{next(self.contador_talk)}"
+
+    # aguarda ACK com a chave informada até o timeout, sem consumir pacotes do socket
+    def _aguardar_ack(self, chave, timeout: float) -> bool:
+        limite = time.time() + timeout
+        with self.cond_acks:
+            while chave not in self.acks_recebidos:
+                restante = limite - time.time()
+                if restante <= 0:
+                    return False
+                self.cond_acks.wait(restante)
+            return True
+
+    # coloca mensagem TALK na fila do destino; a thread de envio do destino agrupa mensagens pequenas em lotes.
+    # com aguardar=False retorna logo após enfileirar e o resultado é informado a ao_concluir(sucesso)
+    def enviar_mensagem(self, nome_destino: str, mensagem: str, aguardar: bool = True,
+                        ao_concluir: Optional[Callable[[bool], None]] = None) -> bool:
         if nome_destino not in self.dispositivos_ativos:
             print(f"Erro: Dispositivo {nome_destino} não encontrado")
-            return
+            return False
+        item = {
+            'id': self._gerar_id_talk(),
+            'texto': mensagem,
+            'tamanho': len(mensagem.encode()),
+            'evento': threading.Event(),
+            'sucesso': False,
+            'ao_concluir': ao_concluir
+        }
+        with self.cond_talk:
+            self.fila_talk.setdefault(nome_destino, []).append(item)
+            # cada destino tem sua própria thread de envio, para que um destino lento não atrase os outros
+            if nome_destino not in self.threads_talk:
+                thread = threading.Thread(target=self._enviar_talks, args=(nome_destino,))
+                self.threads_talk[nome_destino] = thread
+                thread.start()
+            self.cond_talk.notify_all()
+        if not aguardar:
+            return True
+        item['evento'].wait()
+        return item['sucesso']
+
+    # registra o resultado de uma mensagem TALK e avisa quem aguarda por ela
+    def _concluir_talk(self, item: dict, sucesso: bool):
+        item['sucesso'] = sucesso
+        item['evento'].set()
+        if item['ao_concluir'] is not None:
+            try:
+                item['ao_concluir'](sucesso)
+            except Exception as e:
+                self._log(f"ERRO no retorno do envio da mensagem {item['id']}: {e}")
+
+    # thread de envio de um destino: esvazia a fila dele em lotes e se encerra quando fica ociosa
+    def _enviar_talks(self, nome_destino: str):
+        ociosa_desde = time.time()
+        try:
+            while self.running:
+                with self.cond_talk:
+                    fila = self.fila_talk[nome_destino]
+                    if not fila:
+                        if time.time() - ociosa_desde > TALK_SENDER_IDLE_TIMEOUT:
+                            # a remoção acontece sob o lock, então o próximo envio cria uma nova thread
+                            del self.threads_talk[nome_destino]
+                            return
+                        self.cond_talk.wait(timeout=0.5)
+                        continue
+                    lote = self._extrair_lote_talk(fila)
+                try:
+                    sucesso = self._transmitir_lote_talk(nome_destino, lote)
+                except Exception as e:
+                    self._log(f"ERRO ao enviar mensagens para {nome_destino}: {e}")
+                    sucesso = False
+                for item in lote:
+                    self._concluir_talk(item, sucesso)
+                ociosa_desde = time.time()
+        finally:
+            # em qualquer outra saída (encerramento ou erro inesperado), a thread deixa de ser a do destino
+            # e libera quem ainda aguarda mensagens que não serão mais enviadas
+            pendentes = []
+            with self.cond_talk:
+                if self.threads_talk.get(nome_destino) is threading.current_thread():
+                    del self.threads_talk[nome_destino]
+                    pendentes = list(self.fila_talk[nome_destino])
+                    self.fila_talk[nome_destino].clear()
+            for item in pendentes:
+                self._concluir_talk(item, False)
+
+    # retira da fila as próximas mensagens que cabem em um único datagrama
+    def _extrair_lote_talk(self, fila: List[dict]) -> List[dict]:
+        # mensagens grandes são enviadas sozinhas, fragmentadas
+        if fila[0]['tamanho'] > TALK_FRAGMENT_SIZE:
+            return [fila.pop(0)]
+        lote = []
+        tamanho_lote = 2  # colchetes da lista json
+        while fila and len(lote) < TALK_BATCH_MAX:
+            item = fila[0]
+            if item['tamanho'] > TALK_FRAGMENT_SIZE:
+                break
+            tamanho_item = len(json.dumps([item['id'], item['texto']], ensure_ascii=False, separators=(',', ':')).encode()) + 1
+            if lote and tamanho_lote + tamanho_item > TALK_FRAGMENT_SIZE:
+                break
+            tamanho_lote += tamanho_item
+            lote.append(fila.pop(0))
+        return lote
+
+    # envia lote de mensagens TALK (simples, fragmentada ou agrupada), aguarda ACK e retransmite se necessário
+    def _transmitir_lote_talk(self, nome_destino: str, lote: List[dict]) -> bool:
+        if nome_destino not in self.dispositivos_ativos:
+            print(f"Erro: Dispositivo {nome_destino} não encontrado")
+            return False
         ip, porta, _ = self.dispositivos_ativos[nome_destino]
-        id_msg = f"{self.nome}_{int(time.time())}"
-        mensagem_completa = f"TALK {id_msg} {mensagem}"
-        self._log(f"ENVIANDO TALK para {ip}:{porta} (ID: {id_msg}): {mensagem}")
+        if len(lote) == 1 and lote[0]['tamanho'] > TALK_FRAGMENT_SIZE:
+            return self._enviar_talk_fragmentado(ip, porta, lote[0]['id'], lote[0]['texto'])
+        if len(lote) == 1:
+            id_ack = lote[0]['id']
+            mensagem_completa = f"TALK {id_ack} {lote[0]['texto']}"
+            self._log(f"ENVIANDO TALK para {ip}:{porta} (ID: {id_ack}): {lote[0]['texto']}")
+        else:
+            id_ack = self._gerar_id_talk()
+            mensagens = json.dumps([[item['id'], item['texto']] for item in lote], ensure_ascii=False, separators=(',', ':'))
+            mensagem_completa = f"TALKBATCH {id_ack} {mensagens}"
+            self._log(f"ENVIANDO TALKBATCH para {ip}:{porta} (ID: {id_ack}) com {len(lote)} mensagens")
+        self.talks_pendentes.add(id_ack)
         max_tentativas = 3
-        tentativa = 0
-        while tentativa < max_tentativas:
-            self.socket.sendto(mensagem_completa.encode(), (ip, porta))
-            try:
-                self.socket.settimeout(2)
-                while True:
-                    dados, _ = self.socket.recvfrom(1024)
-                    resposta = dados.decode().split()
-                    if len(resposta) >= 2 and resposta[0] == "ACK" and resposta[1] == id_msg:
-                        self._log(f"ACK recebido para mensagem {id_msg}")
-                        return
-            except socket.timeout:
-                tentativa += 1
-                if tentativa < max_tentativas:
-                    self._log(f"Tentativa {tentativa + 1} de enviar mensagem {id_msg}...")
+        try:
+            for tentativa in range(max_tentativas):
+                if tentativa > 0:
+                    self._log(f"Tentativa {tentativa + 1} de enviar mensagem {id_ack}...")
+                self.socket.sendto(mensagem_completa.encode(), (ip, porta))
+                if self._aguardar_ack(id_ack, 2):
+                    self._log(f"ACK recebido para mensagem {id_ack}")
+                    return True
+            self._log(f"Falha ao enviar mensagem {id_ack} após {max_tentativas} tentativas")
+            return False
+        finally:
+            self._finalizar_talk_pendente(id_ack, [id_ack])
+
+    # divide o texto em fragmentos de até TALK_FRAGMENT_SIZE bytes sem quebrar caracteres utf-8
+    def _fragmentar_texto(self, mensagem: str) -> List[str]:
+        dados = mensagem.encode()
+        fragmentos = []
+        inicio = 0
+        while inicio < len(dados):
+            fim = min(inicio + TALK_FRAGMENT_SIZE, len(dados))
+            # recua enquanto o corte cair em um byte de continuação utf-8 (10xxxxxx)
+            while fim < len(dados) and (dados[fim] & 0xC0) == 0x80:
+                fim -= 1
+            fragmentos.append(dados[inicio:fim].decode())
+            inicio = fim
+        return fragmentos
+
+    # envia mensagem grande em fragmentos TALKFRAG, em janelas, retransmitindo os que não receberam ACK
+    def _enviar_talk_fragmentado(self, ip: str, porta: int, id_msg: str, mensagem: str) -> bool:
+        fragmentos = self._fragmentar_texto(mensagem)
+        total = len(fragmentos)
+        self._log(f"ENVIANDO TALK fragmentado para {ip}:{porta} (ID: {id_msg}) em {total} fragmentos")
+        self.talks_pendentes.add(id_msg)
+        max_tentativas = 3
+        try:
+            for inicio in range(0, total, TALK_FRAG_WINDOW):
+                pendentes = list(range(inicio, min(inicio + TALK_FRAG_WINDOW, total)))
+                for tentativa in range(max_tentativas):
+                    if tentativa > 0:
+                        self._log(f"Tentativa {tentativa + 1} de enviar {len(pendentes)} fragmentos de {id_msg}...")
+                    for seq in pendentes:
+                        msg_frag = f"TALKFRAG {id_msg} {seq} {total} {fragmentos[seq]}"
+                        self.socket.sendto(msg_frag.encode(), (ip, porta))
+                    limite = time.time() + 2
+                    pendentes = [seq for seq in pendentes
+                                 if not self._aguardar_ack((id_msg, seq), max(0.0, limite - time.time()))]
+                    if not pendentes:
+                        break
                 else:
                     self._log(f"Falha ao enviar mensagem {id_msg} após {max_tentativas} tentativas")
-            finally:
-                self.socket.settimeout(None)
+                    return False
+            self._log(f"ACK recebido para todos os {total} fragmentos da mensagem {id_msg}")
+            return True
+        finally:
+            self._finalizar_talk_pendente(id_msg, [(id_msg, seq) for seq in range(total)])
+
+    # marca o id de TALK como concluído e descarta seus ACKs; ACKs que chegarem depois são ignorados
+    def _finalizar_talk_pendente(self, id_msg: str, chaves: list):
+        with self.cond_acks:
+            self.talks_concluidos[id_msg] = time.time()
+            self.talks_pendentes.discard(id_msg)
+            for chave in chaves:
+                self.acks_recebidos.pop(chave, None)
 
     # lista dispositivos ativos, filtrando por último heartbeat menor que 10 segundos
     def listar_dispositivos(self):
@@ -297,12 +564,10 @@ class Dispositivo:
             return ""
 
     # processa mensagem FILE, inicializa estrutura para receber arquivo
-    def _processar_file(self, partes: List[str], endereco):
-        if len(partes) < 4:
-            return
-        id_arquivo = partes[1]
-        nome_arquivo = partes[2]
-        tamanho_total = int(partes[3])
+    def _processar_file(self, msg: File, endereco):
+        id_arquivo = msg.id
+        nome_arquivo = msg.nome
+        tamanho_total = msg.tamanho
         total_blocos = (tamanho_total + CHUNK_SIZE - 1) // CHUNK_SIZE
         print(f"\nSolicitação de recebimento de arquivo: {nome_arquivo} ({tamanho_total} bytes)")
         # envia ACK para confirmar recebimento do FILE (sempre unicast para quem enviou)
@@ -321,12 +586,10 @@ class Dispositivo:
         }
 
     # processa mensagem CHUNK, armazena bloco recebido e envia ACK
-    def _processar_chunk(self, partes: List[str], endereco):
-        if len(partes) < 4:
-            return
-        id_arquivo = partes[1]
-        seq = int(partes[2])
-        dados_b64 = partes[3]
+    def _processar_chunk(self, msg: Chunk, endereco):
+        id_arquivo = msg.id
+        seq = msg.seq
+        dados_b64 = msg.dados
         if id_arquivo not in self.arquivos_recebidos:
             return
         estado = self.arquivos_recebidos[id_arquivo]
@@ -350,12 +613,9 @@ class Dispositivo:
             print(f"Erro ao enviar ACK de CHUNK: {e}")
 
     # processa mensagem END, verifica integridade e responde com ACK ou NACK
-    def _processar_end(self, partes: List[str], endereco):
-        if len(partes) < 3:
-            print("Mensagem END inválida: número insuficiente de partes")
-            return
-        id_arquivo = partes[1]
-        hash_recebido = partes[2]
+    def _processar_end(self, msg: End, endereco):
+        id_arquivo = msg.id
+        hash_recebido = msg.hash
         if id_arquivo not in self.arquivos_recebidos:
             print(f"Arquivo com id {id_arquivo} não encontrado para verificação de hash.")
             return
@@ -441,39 +701,51 @@ class Dispositivo:
             return
             
         id_arquivo = partes[1]
-        
-        # ACK do FILE
-        if len(partes) == 2:
-            self.acks_recebidos[id_arquivo] = time.time()
-            print(f"ACK do FILE recebido para {id_arquivo}")
-            
-        # ACK de bloco ou END
-        elif len(partes) == 3:
-            try:
-                # Tenta converter para número (ACK de bloco)
-                seq = int(partes[2])
-                self.acks_recebidos[(id_arquivo, seq)] = time.time()
-                print(f"ACK do bloco {seq} recebido para {id_arquivo}")
-            except ValueError:
-                # Se não for número, verifica se é END
-                if partes[2] == 'END':
-                    self.acks_recebidos[(id_arquivo, 'END')] = time.time()
-                    print(f"ACK do END recebido para {id_arquivo}")
+        with self.cond_acks:
+            # ACKs atrasados ou duplicados de TALK já confirmados não são guardados nem exibidos
+            if id_arquivo in self.talks_concluidos:
+                self._log(f"ACK atrasado ou duplicado de TALK ignorado para {id_arquivo}")
+                return
+            # ACKs de TALK só vão para o log, para não poluir a tela durante rajadas de mensagens
+            eh_talk = id_arquivo in self.talks_pendentes
+
+            # ACK do FILE
+            if len(partes) == 2:
+                self.acks_recebidos[id_arquivo] = time.time()
+                if eh_talk:
+                    self._log(f"ACK de TALK recebido para {id_arquivo}")
+                else:
+                    print(f"ACK do FILE recebido para {id_arquivo}")
+                
+            # ACK de bloco ou END
+            elif len(partes) == 3:
+                try:
+                    # Tenta converter para número (ACK de bloco ou de fragmento TALK)
+                    seq = int(partes[2])
+                    self.acks_recebidos[(id_arquivo, seq)] = time.time()
+                    if eh_talk:
+                        self._log(f"ACK do fragmento {seq} recebido para {id_arquivo}")
+                    else:
+                        print(f"ACK do bloco {seq} recebido para {id_arquivo}")
+                except ValueError:
+                    # Se não for número, verifica se é END
+                    if partes[2] == 'END':
+                        self.acks_recebidos[(id_arquivo, 'END')] = time.time()
+                        print(f"ACK do END recebido para {id_arquivo}")
+            # acorda quem está aguardando ACK
+            self.cond_acks.notify_all()
 
     # processa mensagem NACK, trata falhas de integridade
-    def _processar_nack(self, partes: List[str], endereco):
+    def _processar_nack(self, msg: Nack, endereco):
         """
         Processa mensagem NACK recebida, trata falhas de integridade.
         
         Args:
-            partes: Lista com partes da mensagem [NACK, id, motivo]
+            msg: Mensagem NACK decodificada (id e motivo)
             endereco: Endereço (ip, porta) do remetente
         """
-        if len(partes) < 3:
-            return
-            
-        id_arquivo = partes[1]
-        motivo = partes[2]
+        id_arquivo = msg.id
+        motivo = msg.motivo
         
         print(f"Recebido NACK para {id_arquivo}: {motivo}")
         
@@ -489,6 +761,11 @@ class Dispositivo:
             self.thread_heartbeat.join(timeout=1)
             self.thread_receiver.join(timeout=1)
             self.thread_cleanup.join(timeout=1)
+            with self.cond_talk:
+                threads_talk = list(self.threads_talk.values())
+                self.cond_talk.notify_all()
+            for thread in threads_talk:
+                thread.join(timeout=1)
         except Exception as e:
             self._log(f"Erro ao aguardar threads: {e}")
         try:
@@ -86,9 +86,13 @@ class Interface:
                 print(f"\nErro: Dispositivo {nome_destino} não encontrado")
                 input("\nPressione Enter para continuar...")
                 return
-            # chama método do dispositivo para enviar mensagem
-            self.dispositivo.enviar_mensagem(nome_destino, mensagem)
-            print(f"\nMensagem enviada para {nome_destino}")
+            # enfileira a mensagem sem bloquear a interface; mensagens digitadas enquanto outra
+            # aguarda ACK são agrupadas em um único datagrama pelo dispositivo
+            if self.dispositivo.enviar_mensagem(nome_destino, mensagem, aguardar=False,
+                                                ao_concluir=lambda sucesso: self._resultado_envio(nome_destino, sucesso)):
+                print(f"\nMensagem enfileirada para envio a {nome_destino}")
+            else:
+                print(f"\nFalha ao enviar mensagem para {nome_destino}")
             print("\n" + "-" * 50)
             input("\nPressione Enter para continuar...")
         except Exception as e:
@@ -96,6 +100,14 @@ class Interface:
             print(f"\nErro ao enviar mensagem: {e}")
             input("\nPressione Enter para continuar...")
 
+    # informa o resultado do envio de uma mensagem, chamado pela thread de envio do dispositivo
+    def _resultado_envio(self, nome_destino: str, sucesso: bool):
+        if sucesso:
+            logging.info(f"Mensagem entregue a {nome_destino}")
+        else:
+            logging.error(f"Falha ao enviar mensagem para {nome_destino}")
+            print(f"\nFalha ao enviar mensagem para {nome_destino}: sem ACK após as retransmissões")
+
     # interface para enviar arquivo usando comando sendfile
     def enviar_arquivo(self):
         dispositivos = self.dispositivo.listar_dispositivos()
@@ -0,0 +1,169 @@
+# camada de decodificação das mensagens do protocolo: cada datagrama é analisado uma única vez,
+# separando apenas os campos de cabeçalho necessários; textos e dados base64 ficam intactos
+
+# primeiro byte dos pacotes pequenos e mais frequentes, HEARTBEAT e ACK (nenhum outro tipo começa com
+# essas letras). para eles, criar um objeto custa mais que o próprio split, então não passam por este
+# módulo: o dispositivo os reconhece pelo primeiro byte e entrega a lista de campos ao tratador
+INICIAL_HEARTBEAT = ord("H")
+INICIAL_ACK = ord("A")
+
+
+# mensagem TALK <id> <mensagem>
+class Talk:
+    __slots__ = ('id', 'texto')
+
+    def __init__(self, id: str, texto: str):
+        self.id = id
+        self.texto = texto
+
+    # resumo do cabeçalho para o log, sem o texto
+    def __str__(self):
+        return f"TALK {self.id}"
+
+    @classmethod
+    def decodificar(cls, dados: bytes):
+        # separa só o id para preservar os espaços do texto
+        _, id_msg, texto = dados.split(b" ", 2)
+        # texto vazio ou só com espaços é rejeitado, como no formato original
+        if not texto.strip():
+            raise ValueError("TALK sem texto")
+        return cls(id_msg.decode(), texto.decode())
+
+
+# mensagem TALKFRAG <id> <seq> <total> <fragmento>
+class TalkFragmento:
+    __slots__ = ('id', 'seq', 'total', 'texto')
+
+    def __init__(self, id: str, seq: int, total: int, texto: str):
+        self.id = id
+        self.seq = seq
+        self.total = total
+        self.texto = texto
+
+    def __str__(self):
+        return f"TALKFRAG {self.id} {self.seq}/{self.total}"
+
+    @classmethod
+    def decodificar(cls, dados: bytes):
+        # fragmentos podem ser só espaços (parte de um texto maior), mas nunca vazios
+        _, id_msg, seq, total, texto = dados.split(b" ", 4)
+        if not texto:
+            raise ValueError("TALKFRAG sem texto")
+        return cls(id_msg.decode(), int(seq), int(total), texto.decode())
+
+
+# mensagem TALKBATCH <id_lote> <json>
+class TalkLote:
+    __slots__ = ('id', 'json')
+
+    def __init__(self, id: str, json: str):
+        self.id = id
+        self.json = json
+
+    def __str__(self):
+        return f"TALKBATCH {self.id}"
+
+    @classmethod
+    def decodificar(cls, dados: bytes):
+        _, id_lote, mensagens = dados.split(b" ", 2)
+        return cls(id_lote.decode(), mensagens.decode())
+
+
+# mensagem FILE <id> <nome> <tamanho>
+class File:
+    __slots__ = ('id', 'nome', 'tamanho')
+
+    def __init__(self, id: str, nome: str, tamanho: int):
+        self.id = id
+        self.nome = nome
+        self.tamanho = tamanho
+
+    def __str__(self):
+        return f"FILE {self.id} {self.nome} {self.tamanho}"
+
+    @classmethod
+    def decodificar(cls, dados: bytes):
+        # campos extras depois do tamanho são ignorados, como no formato original
+        id_arquivo, nome, tamanho = dados.split(None, 4)[1:4]
+        return cls(id_arquivo.decode(), nome.decode(), int(tamanho))
+
+
+# mensagem CHUNK <id> <seq> <dados_base64>
+class Chunk:
+    __slots__ = ('id', 'seq', 'dados')
+
+    def __init__(self, id: str, seq: int, dados: bytes):
+        self.id = id
+        self.seq = seq
+        self.dados = dados
+
+    def __str__(self):
+        return f"CHUNK {self.id} {self.seq}"
+
+    @classmethod
+    def decodificar(cls, dados: bytes):
+        # os dados base64 ficam em bytes, sem passar por str, e vão direto para o b64decode
+        _, id_arquivo, seq, dados_b64 = dados.split(None, 3)
+        return cls(id_arquivo.decode(), int(seq), dados_b64)
+
+
+# mensagem END <id> <hash>
+class End:
+    __slots__ = ('id', 'hash')
+
+    def __init__(self, id: str, hash: str):
+        self.id = id
+        self.hash = hash
+
+    def __str__(self):
+        return f"END {self.id} {self.hash}"
+
+    @classmethod
+    def decodificar(cls, dados: bytes):
+        id_arquivo, hash_arquivo = dados.split(None, 3)[1:3]
+        return cls(id_arquivo.decode(), hash_arquivo.decode())
+
+
+# mensagem NACK <id> <motivo>
+class Nack:
+    __slots__ = ('id', 'motivo')
+
+    def __init__(self, id: str, motivo: str):
+        self.id = id
+        self.motivo = motivo
+
+    def __str__(self):
+        return f"NACK {self.id} {self.motivo}"
+
+    @classmethod
+    def decodificar(cls, dados: bytes):
+        id_arquivo, motivo = dados.split(None, 3)[1:3]
+        return cls(id_arquivo.decode(), motivo.decode())
+
+
+# tabela de decodificação: tipo da mensagem (primeiro campo do datagrama) -> decodificador da classe
+DECODIFICADORES = {
+    b"TALK": Talk.decodificar,
+    b"TALKFRAG": TalkFragmento.decodificar,
+    b"TALKBATCH": TalkLote.decodificar,
+    b"FILE": File.decodificar,
+    b"CHUNK": Chunk.decodificar,
+    b"END": End.decodificar,
+    b"NACK": Nack.decodificar,
+}
+
+
+# decodifica um datagrama em objeto de mensagem; retorna None se o tipo for desconhecido (inclusive
+# HEARTBEAT e ACK, tratados pelo caminho rápido do dispositivo) ou os campos inválidos
+def decodificar(dados: bytes):
+    # localiza o tipo uma única vez; cada decodificador faz um só split, do tamanho do seu cabeçalho
+    fim_tipo = dados.find(b" ")
+    if fim_tipo < 0:
+        return None
+    decodificador = DECODIFICADORES.get(dados[:fim_tipo])
+    if decodificador is None:
+        return None
+    try:
+        return decodificador(dados)
+    except (ValueError, UnicodeDecodeError):
+        return None
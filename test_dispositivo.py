@@ -0,0 +1,237 @@
+# importa unittest para os testes do envio e recebimento de mensagens TALK
+import unittest
+# importa mock para capturar as mensagens exibidas na tela
+from unittest import mock
+# importa json para conferir o tamanho dos lotes TALKBATCH
+import json
+# importa itertools e threading para montar o estado do dispositivo sem iniciar as threads
+import itertools
+import threading
+# importa o dispositivo e as mensagens do protocolo
+from dispositivo import Dispositivo, TALK_FRAGMENT_SIZE, TALK_BATCH_MAX
+from mensagens import Talk, TalkFragmento, TalkLote, Chunk
+
+ENDERECO = ('127.0.0.1', 5000)
+
+
+# socket falso que só registra os datagramas enviados
+class SocketFalso:
+    def __init__(self):
+        self.enviados = []
+
+    def sendto(self, dados: bytes, endereco):
+        self.enviados.append((dados, endereco))
+
+
+# cria um dispositivo sem socket real e sem as threads de heartbeat, recebimento e limpeza
+def criar_dispositivo() -> Dispositivo:
+    disp = Dispositivo.__new__(Dispositivo)
+    disp.nome = "teste"
+    disp.running = True
+    disp.socket = SocketFalso()
+    disp.dispositivos_ativos = {"outro": ('127.0.0.1', 5001, 0)}
+    disp.mensagens_recebidas = {}
+    disp.talks_fragmentados = {}
+    disp.fila_talk = {}
+    disp.cond_talk = threading.Condition()
+    disp.threads_talk = {}
+    disp.contador_talk = itertools.count()
+    return disp
+
+
+# cria item da fila de TALK como em enviar_mensagem
+def criar_item(id_msg: str, texto: str) -> dict:
+    return {'id': id_msg, 'texto': texto, 'tamanho': len(texto.encode()), 'evento': threading.Event(),
+            'sucesso': False, 'ao_concluir': None}
+
+
+# testes da divisão de textos grandes em fragmentos TALKFRAG
+class TestFragmentarTexto(unittest.TestCase):
+    def setUp(self):
+        self.disp = criar_dispositivo()
+
+    # confere que cada fragmento cabe no limite e que a junção reconstrói o texto
+    def verificar(self, texto: str):
+        fragmentos = self.disp._fragmentar_texto(texto)
+        self.assertEqual("".join(fragmentos), texto)
+        for fragmento in fragmentos:
+            self.assertTrue(0 < len(fragmento.encode()) <= TALK_FRAGMENT_SIZE)
+        return fragmentos
+
+    # texto ascii é dividido em blocos exatos de TALK_FRAGMENT_SIZE bytes
+    def test_ascii(self):
+        self.assertEqual(len(self.verificar("a" * TALK_FRAGMENT_SIZE)), 1)
+        fragmentos = self.verificar("a" * (TALK_FRAGMENT_SIZE * 2 + 1))
+        self.assertEqual([len(f) for f in fragmentos], [TALK_FRAGMENT_SIZE, TALK_FRAGMENT_SIZE, 1])
+
+    # caractere de 2 bytes cruzando o limite vai inteiro para o próximo fragmento
+    def test_caractere_no_limite_2_bytes(self):
+        fragmentos = self.verificar("a" * (TALK_FRAGMENT_SIZE - 1) + "é")
+        self.assertEqual(fragmentos, ["a" * (TALK_FRAGMENT_SIZE - 1), "é"])
+
+    # caractere de 3 bytes cruzando o limite vai inteiro para o próximo fragmento
+    def test_caractere_no_limite_3_bytes(self):
+        fragmentos = self.verificar("a" * (TALK_FRAGMENT_SIZE - 2) + "€")
+        self.assertEqual(fragmentos, ["a" * (TALK_FRAGMENT_SIZE - 2), "€"])
+
+    # texto só com caracteres de vários bytes
+    def test_multibyte(self):
+        self.verificar("olá, ção € 😀 " * 500)
+
+
+# testes da remontagem de mensagens TALKFRAG
+class TestRemontagemFragmentos(unittest.TestCase):
+    def setUp(self):
+        self.disp = criar_dispositivo()
+
+    # fragmentos fora de ordem e duplicados exibem a mensagem uma única vez e todos recebem ACK
+    @mock.patch('builtins.print')
+    def test_fora_de_ordem_e_duplicados(self, mock_print):
+        for seq, texto in [(2, "c"), (0, "a"), (2, "c"), (1, "b"), (0, "a")]:
+            self.disp._processar_talk_fragmento(TalkFragmento("x_1_0", seq, 3, texto), ENDERECO)
+        mock_print.assert_called_once_with("\nMensagem recebida: abc")
+        self.assertEqual(len(self.disp.socket.enviados), 5)
+        self.assertEqual(self.disp.socket.enviados[0], (b"ACK x_1_0 2", ENDERECO))
+        self.assertEqual(self.disp.talks_fragmentados, {})
+
+    # fragmento com total diferente do primeiro é rejeitado, sem ACK
+    @mock.patch('builtins.print')
+    def test_total_diferente(self, mock_print):
+        self.disp._processar_talk_fragmento(TalkFragmento("x_1_0", 0, 2, "a"), ENDERECO)
+        self.disp._processar_talk_fragmento(TalkFragmento("x_1_0", 1, 1, "b"), ENDERECO)
+        self.disp._processar_talk_fragmento(TalkFragmento("x_1_0", 2, 3, "c"), ENDERECO)
+        mock_print.assert_not_called()
+        self.assertEqual(self.disp.socket.enviados, [(b"ACK x_1_0 0", ENDERECO)])
+        self.assertEqual(self.disp.talks_fragmentados["x_1_0"]['fragmentos'], {0: "a"})
+
+
+# testes do recebimento de lotes TALKBATCH
+class TestLoteRecebido(unittest.TestCase):
+    def setUp(self):
+        self.disp = criar_dispositivo()
+
+    # lote válido exibe cada mensagem e envia um único ACK
+    @mock.patch('builtins.print')
+    def test_lote_valido(self, mock_print):
+        self.disp._processar_talk_lote(TalkLote("x_1_9", '[["x_1_0","oi"],["x_1_1","tchau"]]'), ENDERECO)
+        self.assertEqual(mock_print.call_count, 2)
+        self.assertEqual(self.disp.socket.enviados, [(b"ACK x_1_9", ENDERECO)])
+
+    # json que não é uma lista de pares [id, texto] é rejeitado, sem ACK e sem exceção
+    @mock.patch('builtins.print')
+    def test_lote_invalido(self, mock_print):
+        for conteudo in ['{"a": 1}', '[["x_1_0"]]', '[["x_1_0","oi","extra"]]', '[[1,"oi"]]', '["oi"]', '[["x_1_0","oi"],3]']:
+            self.disp._processar_talk_lote(TalkLote("x_1_9", conteudo), ENDERECO)
+        mock_print.assert_not_called()
+        self.assertEqual(self.disp.socket.enviados, [])
+
+
+# testes da montagem dos lotes na fila de envio
+class TestExtrairLote(unittest.TestCase):
+    def setUp(self):
+        self.disp = criar_dispositivo()
+
+    # o lote respeita o limite de TALK_BATCH_MAX mensagens
+    def test_limite_quantidade(self):
+        fila = [criar_item(f"x_1_{i}", "oi") for i in range(TALK_BATCH_MAX + 10)]
+        lote = self.disp._extrair_lote_talk(fila)
+        self.assertEqual(len(lote), TALK_BATCH_MAX)
+        self.assertEqual(len(fila), 10)
+        self.assertEqual(lote[0]['id'], "x_1_0")
+
+    # o json do lote não passa de TALK_FRAGMENT_SIZE bytes
+    def test_limite_tamanho(self):
+        fila = [criar_item(f"x_1_{i}", "olá " * 25) for i in range(20)]
+        lote = self.disp._extrair_lote_talk(fila)
+        self.assertGreater(len(lote), 1)
+        self.assertTrue(fila)
+        mensagens = json.dumps([[item['id'], item['texto']] for item in lote], ensure_ascii=False, separators=(',', ':'))
+        self.assertLessEqual(len(mensagens.encode()), TALK_FRAGMENT_SIZE)
+        proximo = json.dumps([[item['id'], item['texto']] for item in lote + fila[:1]], ensure_ascii=False, separators=(',', ':'))
+        self.assertGreater(len(proximo.encode()), TALK_FRAGMENT_SIZE)
+
+    # mensagem grande no início da fila é enviada sozinha
+    def test_grande_no_inicio(self):
+        fila = [criar_item("x_1_0", "a" * (TALK_FRAGMENT_SIZE + 1)), criar_item("x_1_1", "oi")]
+        lote = self.disp._extrair_lote_talk(fila)
+        self.assertEqual([item['id'] for item in lote], ["x_1_0"])
+        self.assertEqual(len(fila), 1)
+
+    # mensagem grande no meio da fila encerra o lote, mantendo a ordem
+    def test_grande_no_meio(self):
+        fila = [criar_item("x_1_0", "oi"), criar_item("x_1_1", "a" * (TALK_FRAGMENT_SIZE + 1)), criar_item("x_1_2", "oi")]
+        lote = self.disp._extrair_lote_talk(fila)
+        self.assertEqual([item['id'] for item in lote], ["x_1_0"])
+        self.assertEqual([item['id'] for item in fila], ["x_1_1", "x_1_2"])
+
+
+# testes da thread de envio de um destino
+class TestThreadEnvio(unittest.TestCase):
+    # erro no envio conclui o lote com falha e remove a thread do destino
+    def test_erro_no_envio(self):
+        disp = criar_dispositivo()
+        disp._log = lambda mensagem, mostrar_tela=False: None
+
+        def falhar(nome_destino, lote):
+            raise OSError("destino inválido")
+        disp._transmitir_lote_talk = falhar
+        resultados = []
+        self.assertFalse(disp.enviar_mensagem("outro", "oi", ao_concluir=resultados.append))
+        self.assertEqual(resultados, [False])
+        disp.running = False
+        for thread in list(disp.threads_talk.values()):
+            thread.join(timeout=2)
+        self.assertEqual(disp.threads_talk, {})
+
+    # saída da thread (encerramento) conclui com falha as mensagens que ficaram na fila
+    def test_encerramento_libera_fila(self):
+        disp = criar_dispositivo()
+        disp.running = False
+        item = criar_item("x_1_0", "oi")
+        disp.fila_talk["outro"] = [item]
+        thread = threading.Thread(target=disp._enviar_talks, args=("outro",))
+        disp.threads_talk["outro"] = thread
+        thread.start()
+        thread.join(timeout=2)
+        self.assertTrue(item['evento'].is_set())
+        self.assertFalse(item['sucesso'])
+        self.assertEqual(disp.threads_talk, {})
+        self.assertEqual(disp.fila_talk["outro"], [])
+
+
+# testes do tratamento de cada datagrama recebido
+class TestTratarDatagrama(unittest.TestCase):
+    def setUp(self):
+        self.disp = criar_dispositivo()
+        self.recebidos = []
+        self.disp._processar_heartbeat = lambda partes, endereco: self.recebidos.append(partes)
+        self.disp._processar_ack = lambda partes, endereco: self.recebidos.append(partes)
+        self.disp.tratadores = {Talk: lambda msg, endereco: self.recebidos.append(msg),
+                                Chunk: lambda msg, endereco: self.recebidos.append(msg)}
+
+    # HEARTBEAT e ACK seguem o caminho rápido, com a lista de campos entregue ao tratador
+    def test_caminho_rapido(self):
+        self.disp._tratar_datagrama(b"HEARTBEAT disp1", ENDERECO)
+        self.disp._tratar_datagrama(b"ACK arq_1 3", ENDERECO)
+        self.disp._tratar_datagrama(b"ACK", ENDERECO)
+        self.disp._tratar_datagrama(b"HELLO disp1", ENDERECO)
+        self.disp._tratar_datagrama(b"ACKS x", ENDERECO)
+        self.assertEqual(self.recebidos, [["HEARTBEAT", "disp1"], ["ACK", "arq_1", "3"], ["ACK"]])
+
+    # os demais tipos são decodificados e despachados pela tabela de tratadores
+    def test_despacho_por_tabela(self):
+        self.disp._tratar_datagrama("TALK a_1_0  olá ".encode(), ENDERECO)
+        self.disp._tratar_datagrama(b"CHUNK arq_1 7 aGVsbG8=", ENDERECO)
+        self.assertIsInstance(self.recebidos[0], Talk)
+        self.assertEqual(self.recebidos[0].texto, " olá ")
+        self.assertIsInstance(self.recebidos[1], Chunk)
+
+    # datagramas vazios, inválidos ou de tipo desconhecido são descartados
+    def test_descartados(self):
+        for dados in [b"", b"PING x", b"TALK a_1_0", b"CHUNK arq_1 x aGVsbG8="]:
+            self.disp._tratar_datagrama(dados, ENDERECO)
+        self.assertEqual(self.recebidos, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# importa unittest para os testes da camada de decodificação
+import unittest
+# importa a camada de decodificação das mensagens do protocolo
+from mensagens import decodificar, Talk, TalkFragmento, TalkLote, File, Chunk, End, Nack
+
+
+# testes dos casos de borda do decodificador de mensagens
+class TestDecodificar(unittest.TestCase):
+    # TALK preserva espaços no início, no meio e no fim do texto
+    def test_talk_preserva_espacos(self):
+        msg = decodificar("TALK a_1_0   olá   mundo  ".encode())
+        self.assertIsInstance(msg, Talk)
+        self.assertEqual(msg.id, "a_1_0")
+        self.assertEqual(msg.texto, "  olá   mundo  ")
+
+    # TALK sem texto (ou só com espaços) é rejeitado, como no formato original
+    def test_talk_sem_texto(self):
+        self.assertIsNone(decodificar(b"TALK a_1_0"))
+        self.assertIsNone(decodificar(b"TALK a_1_0 "))
+        self.assertIsNone(decodificar(b"TALK a_1_0    "))
+
+    # TALKFRAG aceita fragmento só com espaços, mas não vazio
+    def test_talk_fragmento(self):
+        msg = decodificar(b"TALKFRAG a_1_0 2 5   ")
+        self.assertIsInstance(msg, TalkFragmento)
+        self.assertEqual((msg.id, msg.seq, msg.total, msg.texto), ("a_1_0", 2, 5, "  "))
+        self.assertIsNone(decodificar(b"TALKFRAG a_1_0 2 5 "))
+        self.assertIsNone(decodificar(b"TALKFRAG a_1_0 x 5 texto"))
+
+    # TALKBATCH mantém o json intacto
+    def test_talk_lote(self):
+        msg = decodificar(b'TALKBATCH a_1_9 [["a_1_0","oi  "],["a_1_1","tchau"]]')
+        self.assertIsInstance(msg, TalkLote)
+        self.assertEqual(msg.id, "a_1_9")
+        self.assertEqual(msg.json, '[["a_1_0","oi  "],["a_1_1","tchau"]]')
+
+    # CHUNK mantém o payload base64 em bytes
+    def test_chunk_payload_em_bytes(self):
+        msg = decodificar(b"CHUNK arq_1 7 aGVsbG8=")
+        self.assertIsInstance(msg, Chunk)
+        self.assertEqual((msg.id, msg.seq), ("arq_1", 7))
+        self.assertIsInstance(msg.dados, bytes)
+        self.assertEqual(msg.dados, b"aGVsbG8=")
+        self.assertIsNone(decodificar(b"CHUNK arq_1 7"))
+
+    # FILE, END e NACK ignoram campos extras, como no formato original
+    def test_file_end_nack(self):
+        msg = decodificar(b"FILE arq_1 arq.txt 2048 extra")
+        self.assertIsInstance(msg, File)
+        self.assertEqual((msg.id, msg.nome, msg.tamanho), ("arq_1", "arq.txt", 2048))
+        self.assertIsNone(decodificar(b"FILE arq_1 arq.txt grande"))
+        msg = decodificar(b"END arq_1 abc123")
+        self.assertIsInstance(msg, End)
+        self.assertEqual((msg.id, msg.hash), ("arq_1", "abc123"))
+        msg = decodificar(b"NACK arq_1 END hash_invalido")
+        self.assertIsInstance(msg, Nack)
+        self.assertEqual((msg.id, msg.motivo), ("arq_1", "END"))
+
+    # HEARTBEAT e ACK não passam pelo decodificador (caminho rápido do dispositivo)
+    def test_heartbeat_e_ack(self):
+        self.assertIsNone(decodificar(b"HEARTBEAT disp1"))
+        self.assertIsNone(decodificar(b"ACK a_1_0"))
+
+    # o texto das mensagens mostra só o cabeçalho, usado no log de recebimento
+    def test_resumo_para_log(self):
+        self.assertEqual(str(decodificar(b"CHUNK arq_1 7 aGVsbG8=")), "CHUNK arq_1 7")
+        self.assertEqual(str(decodificar(b"TALK a_1_0 segredo")), "TALK a_1_0")
+        self.assertEqual(str(decodificar(b"TALKFRAG a_1_0 2 5 abc")), "TALKFRAG a_1_0 2/5")
+
+    # utf-8 inválido, datagrama vazio e tipo desconhecido são rejeitados
+    def test_invalidos(self):
+        self.assertIsNone(decodificar(b"TALK a_1_0 \xff\xfe"))
+        self.assertIsNone(decodificar(b""))
+        self.assertIsNone(decodificar(b"PING x"))
+        self.assertIsNone(decodificar(b"TALK"))
+
+
+if __name__ == "__main__":
+    unittest.main()